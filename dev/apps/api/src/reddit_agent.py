@@ -2,6 +2,8 @@ import os
 import time
 import requests
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 from llm_agent import (
@@ -21,11 +23,32 @@ class RedditAgent:
         self.app_id = os.getenv("REDDIT_APP_ID", "app_reddit_api")
         self.app_version = os.getenv("REDDIT_APP_VERSION") or "1.0.0"
         self.user_agent = f"auto_news:{self.app_id}:{self.app_version}"
+        self.session = self._create_session()
         self.access_token = self.auth()
         self._save_ratelimit_info()
 
         print(f"[INFO] Initialized RedditAgent, user_agent: {self.user_agent}")
 
+    def _create_session(self, total=5, backoff_factor=0.3):
+        """
+        Rate limits (429) and transient 5xx responses (common while reddit
+        is under load) are retried with exponential backoff instead of
+        failing the run; urllib3 honours Retry-After for these statuses
+        """
+        retry = Retry(
+            total=total,
+            backoff_factor=backoff_factor,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["POST", "GET"],
+        )
+
+        adapter = HTTPAdapter(max_retries=retry)
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
     def auth(self):
         data = {
             'grant_type': 'client_credentials'
@@ -34,10 +57,10 @@ class RedditAgent:
         auth = requests.auth.HTTPBasicAuth(
             self.client_id, self.client_secret)
 
-        response = requests.post(self.AUTH_URL,
-                                 data=data,
-                                 headers={'User-Agent': self.user_agent},
-                                 auth=auth)
+        response = self.session.post(self.AUTH_URL,
+                                     data=data,
+                                     headers={'User-Agent': self.user_agent},
+                                     auth=auth)
 
         response.raise_for_status()
         return response.json()['access_token']
@@ -47,7 +70,6 @@ class RedditAgent:
         subreddit,
         limit=25,
         wait_on_ratelimit=True,
-        retries=3,
         data_folder="/tmp",
         run_id="",
     ):
@@ -69,19 +91,24 @@ class RedditAgent:
         URL = self.SUBREDDIT_NEW_URL.format(subreddit)
         print(f"[INFO] get_subreddit_posts for url: {URL}")
 
-        def query():
-            response = requests.get(
+        # Transient failures are retried by the session's Retry adapter,
+        # so only the final error is reported here
+        try:
+            response = self.session.get(
                 URL,
                 headers=headers,
                 params=params)
 
             response.raise_for_status()
-            self._save_ratelimit_info(response=response)
 
-            return self._extractSubredditPosts(
-                response, data_folder, run_id)
+        except (requests.exceptions.RetryError, requests.exceptions.HTTPError) as e:
+            print(f"[ERROR] get_subreddit_posts failed for url: {URL}: {e}")
+            raise
+
+        self._save_ratelimit_info(response=response)
 
-        return utils.retry(query, retries=retries)
+        return self._extractSubredditPosts(
+            response, data_folder, run_id)
 
     def _extractSubredditPosts(self, response, data_folder, run_id):
         posts = response.json()["data"]["children"]
@@ -5,15 +5,32 @@ This module provides chunk-level deduplication using:
 - Semantic chunking with RecursiveCharacterTextSplitter
 - Embedding generation (OpenAI text-embedding-3-small)
 - Cosine similarity search (pgvector/ChromaDB)
+
+Exports are resolved lazily so that importing one submodule (e.g. the
+chunker) does not pull in openai/chromadb at startup.
 """
 
-from .chunker import ChunkingPipeline, SemanticChunker
-from .embedder import EmbeddingGenerator
-from .similarity import SimilarityCalculator
+import importlib
+
+_EXPORTS = {
+    'ChunkingPipeline': '.chunker',
+    'SemanticChunker': '.chunker',
+    'EmbeddingGenerator': '.embedder',
+    'SimilarityCalculator': '.similarity',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = [
-    'ChunkingPipeline',
-    'SemanticChunker',
-    'EmbeddingGenerator',
-    'SimilarityCalculator',
-]
+def __dir__():
+    return sorted(list(globals()) + __all__)
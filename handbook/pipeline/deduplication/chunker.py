@@ -1,10 +1,14 @@
 import hashlib
-from typing import Dict, List, Optional
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class Chunk:
@@ -216,29 +220,44 @@ class ChunkingPipeline:
 
         return chunks
 
-    def process_batch(self, articles: List[Dict]) -> Dict[str, List[Chunk]]:
+    def process_batch(
+        self,
+        articles: List[Dict],
+        max_workers: int = 1,
+        chunksize: int = 4,
+    ) -> Dict[str, List[Chunk]]:
         """
         Process multiple articles in batch
 
+        Text splitting is pure-Python CPU work, so large batches can be
+        spread across worker processes to sidestep the GIL
+
         Args:
             articles: List of article dictionaries
+            max_workers: Number of worker processes (1 = process in-line)
+            chunksize: Articles sent to a worker per task when max_workers > 1
 
         Returns:
             Dictionary mapping article_id -> List[Chunk]
         """
-        results = {}
+        articles = [article for article in articles if article.get('id')]
+
+        if max_workers > 1 and len(articles) > 1:
+            config = (self.chunk_size, self.chunk_overlap, self.min_chunk_size)
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(config,),
+            ) as executor:
+                outcomes = list(executor.map(_process_in_worker, articles, chunksize=chunksize))
+        else:
+            outcomes = [_process_safely(self, article) for article in articles]
 
-        for article in articles:
-            article_id = article.get('id')
-            if not article_id:
-                continue
-
-            try:
-                chunks = self.process_article(article)
-                results[article_id] = chunks
-            except Exception as e:
-                print(f"Error processing article {article_id}: {e}")
-                results[article_id] = []
+        results = {}
+        for article_id, chunks, error in outcomes:
+            if error is not None:
+                logger.error("Error processing article %s: %s", article_id, error)
+            results[article_id] = chunks
 
         return results
 
@@ -273,6 +292,38 @@ class ChunkingPipeline:
         }
 
 
+# Per-process pipeline, built once by _init_worker in each worker
+_worker_pipeline: Optional[ChunkingPipeline] = None
+
+
+def _init_worker(config: Tuple[int, int, int]):
+    """Build the worker's pipeline once instead of per article"""
+    global _worker_pipeline
+    chunk_size, chunk_overlap, min_chunk_size = config
+    _worker_pipeline = ChunkingPipeline(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        min_chunk_size=min_chunk_size,
+    )
+
+
+def _process_in_worker(article: Dict) -> Tuple[str, List[Chunk], Optional[str]]:
+    """Chunk one article inside a worker process"""
+    return _process_safely(_worker_pipeline, article)
+
+
+def _process_safely(
+    pipeline: ChunkingPipeline,
+    article: Dict,
+) -> Tuple[str, List[Chunk], Optional[str]]:
+    """Chunk one article, returning the error message instead of raising"""
+    article_id = article.get('id')
+    try:
+        return article_id, pipeline.process_article(article), None
+    except Exception as e:
+        return article_id, [], str(e) or type(e).__name__
+
+
 # Example usage
 if __name__ == "__main__":
     # Example article
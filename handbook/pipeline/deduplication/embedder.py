@@ -9,7 +9,17 @@ Supports:
 """
 
 import os
+import json
+import random
+import logging
 import time
+import sqlite3
+import hashlib
+import unicodedata
+from collections import OrderedDict
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from dotenv import load_dotenv
@@ -17,12 +27,107 @@ from dotenv import load_dotenv
 load_dotenv()
 
 try:
+    import openai
     from openai import OpenAI
+
+    # Errors worth retrying; anything else (auth, bad request) fails immediately
+    TRANSIENT_ERRORS = (
+        openai.RateLimitError,
+        openai.APIConnectionError,  # includes APITimeoutError
+        openai.InternalServerError,
+    )
 except ImportError:
     OpenAI = None
+    TRANSIENT_ERRORS = ()
 
 from .chunker import Chunk
 
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _get_client(api_key: str, timeout: float) -> "OpenAI":
+    """
+    Shared OpenAI client per (API key, timeout)
+
+    The client owns an HTTP connection pool; reusing it across generators
+    keeps connections warm instead of paying a TLS handshake per instance.
+    SDK-level retries are disabled because EmbeddingGenerator retries itself
+    """
+    return OpenAI(api_key=api_key, timeout=timeout, max_retries=0)
+
+
+class PersistentEmbeddingCache:
+    """
+    SQLite-backed embedding cache that survives process restarts
+
+    Re-running the pipeline on a mostly unchanged corpus then only pays
+    for texts that were never embedded before
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the cache database
+
+        Args:
+            path: SQLite file path (parent directory is created if missing)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embedding_cache ("
+            "key TEXT PRIMARY KEY, embedding TEXT NOT NULL, "
+            "token_count INTEGER NOT NULL, ts REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_entry(
+        self,
+        key: str,
+        ttl: Optional[float] = None,
+    ) -> Optional[Tuple[Tuple[List[float], int], float]]:
+        """Look up a cached (embedding, token count) pair and its storage time, ignoring entries older than ttl seconds"""
+        min_ts = time.time() - ttl if ttl is not None else 0.0
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT embedding, token_count, ts FROM embedding_cache WHERE key = ? AND ts > ?",
+                (key, min_ts),
+            ).fetchone()
+        if row is None:
+            return None
+        return (json.loads(row[0]), row[1]), row[2]
+
+    def put_many(self, items: Dict[str, Tuple[List[float], int]]):
+        """Store several (embedding, token count) pairs in one transaction"""
+        if not items:
+            return
+        now = time.time()
+        rows = [
+            (key, json.dumps(embedding), token_count, now)
+            for key, (embedding, token_count) in items.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def clear(self):
+        """Delete all cached embeddings"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM embedding_cache")
+
+    def close(self):
+        """Close the database connection"""
+        self._conn.close()
+
 
 @dataclass
 class EmbeddingResult:
@@ -42,13 +147,18 @@ class EmbeddingGenerator:
 
     Features:
     - Batch processing for cost optimization
-    - Automatic retry with exponential backoff
+    - Offline Batch API jobs for bulk runs (50% discount)
+    - Concurrent batch requests to overlap API round-trips
+    - Content-hash cache so repeated texts are embedded once
+    - Automatic retry of transient errors with jittered exponential backoff
     - Cost tracking
     - Provider abstraction for future multi-provider support
     """
 
     # Pricing (as of 2024): text-embedding-3-small
     COST_PER_1M_TOKENS = 0.02  # $0.02 per 1M tokens
+    BATCH_API_DISCOUNT = 0.5  # Batch API jobs are billed at half price
+    MAX_BATCH_API_REQUESTS = 50_000  # Batch API limit on requests per job
 
     def __init__(
         self,
@@ -57,6 +167,13 @@ class EmbeddingGenerator:
         batch_size: int = 100,
         max_retries: int = 3,
         retry_delay: float = 1.0,
+        max_concurrency: int = 4,
+        enable_cache: bool = True,
+        cache_path: Optional[str] = None,
+        cache_max_size: Optional[int] = 10_000,
+        cache_ttl: Optional[float] = None,
+        request_timeout: float = 30.0,
+        requests_per_minute: Optional[int] = None,
     ):
         """
         Initialize embedding generator
@@ -65,8 +182,17 @@ class EmbeddingGenerator:
             model: OpenAI embedding model (default: text-embedding-3-small)
             api_key: OpenAI API key (defaults to OPENAI_API_KEY env var)
             batch_size: Number of texts to embed in single API call
-            max_retries: Maximum retry attempts for failed requests
-            retry_delay: Initial delay between retries (exponential backoff)
+            max_retries: Maximum attempts per request, including the first (values below 1 mean 1)
+            retry_delay: Initial delay between retries (exponential backoff with jitter)
+            max_concurrency: Maximum number of batch requests in flight at once
+            enable_cache: Reuse embeddings of previously seen texts
+            cache_path: Optional SQLite file to persist the cache across runs
+            cache_max_size: Maximum in-memory cache entries, least recently used evicted first (None = unbounded).
+                A 1536-dim embedding held as a list of Python floats costs ~48 KiB,
+                so the default of 10k entries is roughly 470 MiB
+            cache_ttl: Seconds before a cached embedding expires (None = never)
+            request_timeout: Per-request timeout in seconds, so a stalled call fails fast
+            requests_per_minute: Optional cap on API requests across all workers
         """
         if OpenAI is None:
             raise ImportError(
@@ -76,8 +202,16 @@ class EmbeddingGenerator:
 
         self.model = model
         self.batch_size = batch_size
-        self.max_retries = max_retries
+        # Always make at least one attempt, even with retries disabled
+        self.max_retries = max(1, max_retries)
         self.retry_delay = retry_delay
+        self.max_concurrency = max(1, max_concurrency)
+        self.request_timeout = request_timeout
+
+        # Request pacing shared by concurrent batch workers
+        self.requests_per_minute = requests_per_minute
+        self._rate_lock = threading.Lock()
+        self._next_request_at = 0.0
 
         # Initialize OpenAI client
         api_key = api_key or os.getenv("OPENAI_API_KEY")
@@ -87,12 +221,27 @@ class EmbeddingGenerator:
                 "Set OPENAI_API_KEY environment variable or pass api_key parameter."
             )
 
-        self.client = OpenAI(api_key=api_key)
+        self.client = _get_client(api_key, request_timeout)
 
         # Track costs and usage
         self.total_tokens = 0
         self.total_cost_cents = 0.0
 
+        # Embedding cache: sha256(model, text) -> (embedding, token count)
+        self.enable_cache = enable_cache
+        self.cache_max_size = cache_max_size
+        self.cache_ttl = cache_ttl
+        # key -> ((embedding, token count), stored_at), kept in LRU order
+        self._cache: "OrderedDict[str, Tuple[Tuple[List[float], int], float]]" = OrderedDict()
+        self._disk_cache = (
+            PersistentEmbeddingCache(cache_path) if enable_cache and cache_path else None
+        )
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Batch API jobs that were created but not collected: batch ID -> custom_ids
+        self.pending_batch_jobs: Dict[str, List[str]] = {}
+
     def _estimate_tokens(self, text: str) -> int:
         """
         Rough estimate of token count
@@ -106,36 +255,157 @@ class EmbeddingGenerator:
         """Calculate cost in cents for given token count"""
         return (token_count / 1_000_000) * self.COST_PER_1M_TOKENS * 100
 
+    def _cache_key(self, text: str) -> str:
+        """
+        Cache key for a text, scoped to the embedding model
+
+        The text is NFKC-normalized and whitespace-collapsed first, so
+        full/half-width and spacing variants share one embedding
+        """
+        normalized = ' '.join(unicodedata.normalize('NFKC', text).split())
+        return hashlib.sha256(f"{self.model}\x00{normalized}".encode('utf-8')).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[Tuple[List[float], int]]:
+        """Look up a cached (embedding, token count) pair (memory, then disk)"""
+        if not self.enable_cache:
+            return None
+
+        entry = self._cache.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            if self.cache_ttl is None or time.time() - stored_at < self.cache_ttl:
+                self._cache.move_to_end(key)
+                return value
+            del self._cache[key]
+
+        if self._disk_cache is not None:
+            entry = self._disk_cache.get_entry(key, ttl=self.cache_ttl)
+            if entry is not None:
+                # Keep the original timestamp so promotion does not extend the TTL
+                value, stored_at = entry
+                self._memory_put(key, value, stored_at=stored_at)
+                return value
+
+        return None
+
+    def _memory_put(self, key: str, value: Tuple[List[float], int], stored_at: Optional[float] = None):
+        """Store a pair in the in-memory LRU, evicting the oldest entries when full"""
+        self._cache[key] = (value, time.time() if stored_at is None else stored_at)
+        self._cache.move_to_end(key)
+        if self.cache_max_size is not None:
+            while len(self._cache) > self.cache_max_size:
+                self._cache.popitem(last=False)
+
+    def _cache_put(self, key: str, value: Tuple[List[float], int]):
+        """Store an (embedding, token count) pair"""
+        self._cache_put_many({key: value})
+
+    def _cache_put_many(self, items: Dict[str, Tuple[List[float], int]]):
+        """Store several (embedding, token count) pairs in memory and on disk"""
+        if not self.enable_cache:
+            return
+        for key, value in items.items():
+            self._memory_put(key, value)
+        if self._disk_cache is not None:
+            self._disk_cache.put_many(items)
+
+    def clear_cache(self):
+        """Drop all cached embeddings, including the persistent cache"""
+        self._cache.clear()
+        if self._disk_cache is not None:
+            self._disk_cache.clear()
+
+    def _throttle(self):
+        """
+        Wait for the next request slot when requests_per_minute is set
+
+        Slots are reserved under a lock and spaced evenly, so concurrent
+        workers stay under the limit instead of bursting into 429 errors
+        """
+        if not self.requests_per_minute:
+            return
+
+        interval = 60.0 / self.requests_per_minute
+        with self._rate_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_request_at)
+            self._next_request_at = slot + interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
     def embed_text(self, text: str) -> Tuple[List[float], int]:
         """
         Generate embedding for a single text
 
+        Repeated texts (e.g. the same query embedded several times) are
+        served from the cache instead of calling the API again
+
         Args:
             text: Input text to embed
 
         Returns:
             Tuple of (embedding vector, token count)
         """
-        for attempt in range(self.max_retries):
-            try:
-                response = self.client.embeddings.create(
-                    model=self.model,
-                    input=text,
-                )
+        key = self._cache_key(text)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+
+        self.cache_misses += 1
+        result = self._request_embedding(text)
+        self._cache_put(key, result)
+        return result
+
+    def _request_embedding(self, text: str) -> Tuple[List[float], int]:
+        """Call the embeddings API for a single text, with retries"""
+        response = self._create_embeddings(text, "Embedding")
+        return response.data[0].embedding, response.usage.total_tokens
+
+    def _create_embeddings(self, input, label: str):
+        """
+        Call the embeddings endpoint, retrying transient errors
 
-                embedding = response.data[0].embedding
-                token_count = response.usage.total_tokens
+        Args:
+            input: Text or list of texts to embed
+            label: Request description used in log and error messages
+
+        Returns:
+            Raw embeddings API response
+        """
+        def create():
+            self._throttle()
+            return self.client.embeddings.create(model=self.model, input=input)
 
-                return embedding, token_count
+        return self._with_retries(create, label)
 
-            except Exception as e:
+    def _with_retries(self, call, label: str):
+        """
+        Run an API call, retrying transient errors
+
+        Retries use exponential backoff with full jitter so concurrent
+        workers that fail together do not retry in lockstep
+
+        Args:
+            call: Zero-argument function making the request
+            label: Request description used in log and error messages
+
+        Returns:
+            Whatever call returns
+        """
+        for attempt in range(self.max_retries):
+            try:
+                return call()
+
+            except TRANSIENT_ERRORS as e:
                 if attempt < self.max_retries - 1:
-                    delay = self.retry_delay * (2 ** attempt)
-                    print(f"Embedding failed (attempt {attempt + 1}/{self.max_retries}): {e}")
-                    print(f"Retrying in {delay}s...")
+                    delay = random.uniform(0, self.retry_delay * (2 ** attempt))
+                    logger.warning("%s failed (attempt %d/%d): %s; retrying in %.2fs",
+                                   label, attempt + 1, self.max_retries, e, delay)
                     time.sleep(delay)
                 else:
-                    raise Exception(f"Failed to generate embedding after {self.max_retries} attempts: {e}")
+                    raise Exception(f"{label} failed after {self.max_retries} attempts: {e}") from e
 
     def embed_batch(self, texts: List[str]) -> List[Tuple[List[float], int]]:
         """
@@ -150,33 +420,12 @@ class EmbeddingGenerator:
         if not texts:
             return []
 
-        for attempt in range(self.max_retries):
-            try:
-                response = self.client.embeddings.create(
-                    model=self.model,
-                    input=texts,
-                )
-
-                results = []
-                for data in response.data:
-                    results.append((data.embedding, 0))  # Token count per item not available in batch
+        response = self._create_embeddings(texts, "Batch embedding")
 
-                total_tokens = response.usage.total_tokens
-                avg_tokens_per_text = total_tokens // len(texts)
+        # Token count per item is not available in batch responses
+        avg_tokens_per_text = response.usage.total_tokens // len(texts)
 
-                # Update token counts
-                results = [(emb, avg_tokens_per_text) for emb, _ in results]
-
-                return results
-
-            except Exception as e:
-                if attempt < self.max_retries - 1:
-                    delay = self.retry_delay * (2 ** attempt)
-                    print(f"Batch embedding failed (attempt {attempt + 1}/{self.max_retries}): {e}")
-                    print(f"Retrying in {delay}s...")
-                    time.sleep(delay)
-                else:
-                    raise Exception(f"Failed to generate batch embeddings after {self.max_retries} attempts: {e}")
+        return [(data.embedding, avg_tokens_per_text) for data in response.data]
 
     def embed_chunk(self, chunk: Chunk) -> EmbeddingResult:
         """
@@ -188,7 +437,22 @@ class EmbeddingGenerator:
         Returns:
             EmbeddingResult with embedding and metadata
         """
-        embedding, token_count = self.embed_text(chunk.chunk_text)
+        key = self._cache_key(chunk.chunk_text)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            embedding, token_count = cached
+            return EmbeddingResult(
+                chunk_id=chunk.chunk_id,
+                embedding=embedding,
+                model=self.model,
+                token_count=token_count,
+                cost_cents=0.0,
+            )
+
+        self.cache_misses += 1
+        embedding, token_count = self._request_embedding(chunk.chunk_text)
+        self._cache_put(key, (embedding, token_count))
         cost_cents = self._calculate_cost(token_count)
 
         # Update totals
@@ -219,40 +483,339 @@ class EmbeddingGenerator:
         if not chunks:
             return []
 
-        results = []
         total_chunks = len(chunks)
+        keys, cached, missing = self._resolve_cached(chunks)
+
+        missing_keys = list(missing.keys())
+        missing_texts = list(missing.values())
+        batches = [
+            (missing_keys[i:i + self.batch_size], missing_texts[i:i + self.batch_size])
+            for i in range(0, len(missing_texts), self.batch_size)
+        ]
+
+        logger.info("Processing %d batches (%d of %d chunks not cached, max_concurrency=%d)",
+                    len(batches), len(missing_texts), total_chunks, self.max_concurrency)
+
+        fresh = {}
+        error = None
+
+        # Batches are independent API calls, so overlap their round-trips.
+        # Each batch is collected on its own so that one failure does not
+        # discard batches that already succeeded (and were paid for)
+        if self.max_concurrency > 1 and len(batches) > 1:
+            workers = min(self.max_concurrency, len(batches))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    (batch_keys, executor.submit(self.embed_batch, texts))
+                    for batch_keys, texts in batches
+                ]
+                for batch_keys, future in futures:
+                    try:
+                        fresh.update(zip(batch_keys, future.result()))
+                    except Exception as e:
+                        error = error or e
+        else:
+            for batch_keys, texts in batches:
+                try:
+                    fresh.update(zip(batch_keys, self.embed_batch(texts)))
+                except Exception as e:
+                    error = e
+                    break
+
+        self._cache_put_many(fresh)
+
+        if error is not None:
+            # Successful batches are cached and billed; the caller can retry the rest
+            for _, token_count in fresh.values():
+                self.total_tokens += token_count
+                self.total_cost_cents += self._calculate_cost(token_count)
+            logger.error("Embedded %d of %d uncached chunks before a batch failed: %s",
+                         len(fresh), len(missing_keys), error)
+            raise error
+
+        return self._build_results(chunks, keys, cached, fresh)
+
+    def embed_chunks_batch_api(
+        self,
+        chunks: List[Chunk],
+        poll_interval: float = 30.0,
+        timeout: Optional[float] = None,
+        resume_jobs: Optional[Dict[str, List[str]]] = None,
+    ) -> List[EmbeddingResult]:
+        """
+        Generate embeddings through the OpenAI Batch API
+
+        For offline bulk runs: uncached texts are uploaded as batch jobs
+        (billed at a 50% discount) and this call blocks until they finish.
+        If any request fails, the successful embeddings are still cached
+        before the error is raised, so a rerun only pays for the rest.
+
+        Jobs that could not be collected (timeout, or polling kept failing)
+        are left running and recorded in pending_batch_jobs; pass them back
+        as resume_jobs to collect their results instead of paying twice
+
+        Args:
+            chunks: List of Chunk objects
+            poll_interval: Seconds between job status checks
+            timeout: Maximum seconds to wait for all jobs (None = wait for the completion window)
+            resume_jobs: Previously submitted jobs (batch ID -> custom_ids) to wait on
+                instead of uploading their texts again
+
+        Returns:
+            List of EmbeddingResult objects
+        """
+        if not chunks:
+            return []
+
+        keys, cached, missing = self._resolve_cached(chunks)
+
+        fresh = {}
+        if missing:
+            jobs = {
+                batch_id: job_keys
+                for batch_id, job_keys in (resume_jobs or {}).items()
+                if any(key in missing for key in job_keys)
+            }
+            resumed = len(jobs)
+            covered = {key for job_keys in jobs.values() for key in job_keys}
+            to_submit = {key: text for key, text in missing.items() if key not in covered}
+            if to_submit:
+                jobs.update(self.submit_batch_jobs(to_submit))
+            logger.info("Waiting on %d batch jobs (%d resumed, %d of %d chunks not cached)",
+                        len(jobs), resumed, len(missing), len(chunks))
+
+            deadline = None if timeout is None else time.monotonic() + timeout
+            returned = {}
+            failed = {}
+            for batch_id, job_keys in jobs.items():
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    results, errors = self.wait_for_batch_job(
+                        batch_id, poll_interval=poll_interval, timeout=remaining,
+                    )
+                    self.pending_batch_jobs.pop(batch_id, None)
+                except ValueError as e:
+                    # The job itself failed; waiting on it again would not help
+                    self.pending_batch_jobs.pop(batch_id, None)
+                    results, errors = {}, {key: str(e) for key in job_keys}
+                except Exception as e:
+                    # Still running or unreachable: keep it so a rerun can collect it
+                    self.pending_batch_jobs[batch_id] = job_keys
+                    results, errors = {}, {key: str(e) for key in job_keys}
+                returned.update(results)
+                failed.update(errors)
+
+            # Only accept results for keys that were submitted; anything that
+            # never came back counts as failed
+            fresh = {key: returned[key] for key in missing if key in returned}
+            for key in missing:
+                if key not in fresh and key not in failed:
+                    failed[key] = "no result returned"
+            self._cache_put_many(fresh)
+
+            if failed:
+                for _, token_count in fresh.values():
+                    self.total_tokens += token_count
+                    self.total_cost_cents += self._calculate_cost(token_count) * self.BATCH_API_DISCOUNT
+                details = "; ".join(f"{key}: {error}" for key, error in list(failed.items())[:10])
+                unfinished = [batch_id for batch_id in jobs if batch_id in self.pending_batch_jobs]
+                if unfinished:
+                    details += f" (unfinished batch jobs kept in pending_batch_jobs: {', '.join(unfinished)})"
+                raise Exception(
+                    f"Batch API failed for {len(failed)} of {len(missing)} requests "
+                    f"({len(fresh)} successful embeddings were cached): {details}"
+                )
+
+        return self._build_results(chunks, keys, cached, fresh, cost_multiplier=self.BATCH_API_DISCOUNT)
+
+    def submit_batch_jobs(self, texts: Dict[str, str], completion_window: str = "24h") -> Dict[str, List[str]]:
+        """
+        Upload texts as embeddings batch jobs
 
-        # Process in batches
-        for i in range(0, total_chunks, self.batch_size):
-            batch = chunks[i:i + self.batch_size]
-            batch_texts = [c.chunk_text for c in batch]
+        Texts are split into jobs of at most MAX_BATCH_API_REQUESTS requests,
+        the per-job limit of the Batch API. If a later job cannot be created,
+        the jobs already running are recorded in pending_batch_jobs before
+        the error is raised
 
-            print(f"Processing batch {i // self.batch_size + 1}/{(total_chunks + self.batch_size - 1) // self.batch_size} "
-                  f"({len(batch)} chunks)...")
+        Args:
+            texts: Dictionary mapping custom_id (cache key) -> text
+            completion_window: Batch completion window accepted by the API
 
-            # Generate embeddings for batch
-            embeddings_and_tokens = self.embed_batch(batch_texts)
+        Returns:
+            Dictionary mapping batch job ID -> custom_ids submitted in that job
+        """
+        items = list(texts.items())
+        jobs = {}
+
+        try:
+            for start in range(0, len(items), self.MAX_BATCH_API_REQUESTS):
+                job_items = items[start:start + self.MAX_BATCH_API_REQUESTS]
+                payload = '\n'.join(
+                    json.dumps({
+                        'custom_id': custom_id,
+                        'method': 'POST',
+                        'url': '/v1/embeddings',
+                        'body': {'model': self.model, 'input': text},
+                    }, ensure_ascii=False)
+                    for custom_id, text in job_items
+                ).encode('utf-8')
+                input_file = self._with_retries(
+                    lambda: self.client.files.create(
+                        file=('embeddings_batch.jsonl', payload),
+                        purpose='batch',
+                    ),
+                    "Batch input upload",
+                )
+                # Not retried: a lost response could leave a duplicate job running
+                batch = self.client.batches.create(
+                    input_file_id=input_file.id,
+                    endpoint='/v1/embeddings',
+                    completion_window=completion_window,
+                )
+                jobs[batch.id] = [custom_id for custom_id, _ in job_items]
+        except Exception as e:
+            if not jobs:
+                raise
+            self.pending_batch_jobs.update(jobs)
+            raise Exception(
+                f"Batch submission failed after creating {len(jobs)} jobs "
+                f"(kept in pending_batch_jobs: {', '.join(jobs)}): {e}"
+            ) from e
+
+        return jobs
+
+    def wait_for_batch_job(
+        self,
+        batch_id: str,
+        poll_interval: float = 30.0,
+        timeout: Optional[float] = None,
+    ) -> Tuple[Dict[str, Tuple[List[float], int]], Dict[str, str]]:
+        """
+        Poll a batch job until it finishes and parse its output and error files
 
-            # Create results
-            for chunk, (embedding, token_count) in zip(batch, embeddings_and_tokens):
-                cost_cents = self._calculate_cost(token_count)
+        Expired or cancelled jobs still return whatever requests completed.
+        Transient errors while polling or downloading are retried like
+        embedding requests
+
+        Args:
+            batch_id: Batch job ID returned by submit_batch_jobs
+            poll_interval: Seconds between job status checks
+            timeout: Maximum seconds to wait (None = no limit)
+
+        Returns:
+            Tuple of:
+            - Dictionary mapping custom_id -> (embedding vector, token count)
+            - Dictionary mapping custom_id -> error message for failed requests
+
+        Raises:
+            ValueError: If the job failed validation and produced no output
+            TimeoutError: If the job is still running after timeout seconds
+        """
+        started = time.monotonic()
+        while True:
+            batch = self._with_retries(
+                lambda: self.client.batches.retrieve(batch_id),
+                f"Polling batch job {batch_id}",
+            )
+            if batch.status in ('completed', 'expired', 'cancelled'):
+                break
+            if batch.status == 'failed':
+                raise ValueError(f"Batch job {batch_id} failed: {getattr(batch, 'errors', None)}")
+            if timeout is not None and time.monotonic() - started > timeout:
+                raise TimeoutError(f"Batch job {batch_id} not finished after {timeout}s")
+            time.sleep(poll_interval)
+
+        if batch.status != 'completed':
+            logger.warning("Batch job %s ended with status '%s'", batch_id, batch.status)
+
+        results = {}
+        errors = {}
+        # Failed requests go to a separate error file; either file may be absent
+        for file_id in (batch.output_file_id, getattr(batch, 'error_file_id', None)):
+            if not file_id:
+                continue
+            content = self._with_retries(
+                lambda: self.client.files.content(file_id),
+                f"Downloading batch file {file_id}",
+            )
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                custom_id = record.get('custom_id')
+                response = record.get('response') or {}
+                if record.get('error') or response.get('status_code') != 200:
+                    errors[custom_id] = str(record.get('error') or response.get('body'))
+                    continue
+                body = response['body']
+                results[custom_id] = (body['data'][0]['embedding'], body['usage']['total_tokens'])
+
+        return results, errors
+
+    def _resolve_cached(
+        self,
+        chunks: List[Chunk],
+    ) -> Tuple[List[str], Dict[str, Tuple[List[float], int]], Dict[str, str]]:
+        """
+        Split chunks into cached and uncached texts
+
+        Identical texts within the call are only counted as missing once
+
+        Returns:
+            Tuple of (cache key per chunk, cached values by key, uncached texts by key)
+        """
+        keys = [self._cache_key(c.chunk_text) for c in chunks]
+        cached = {}
+        missing = {}
+        for key, chunk in zip(keys, chunks):
+            if key in cached or key in missing:
+                continue
+            hit = self._cache_get(key)
+            if hit is not None:
+                cached[key] = hit
+            else:
+                missing[key] = chunk.chunk_text
+
+        self.cache_hits += len(chunks) - len(missing)
+        self.cache_misses += len(missing)
+
+        return keys, cached, missing
+
+    def _build_results(
+        self,
+        chunks: List[Chunk],
+        keys: List[str],
+        cached: Dict[str, Tuple[List[float], int]],
+        fresh: Dict[str, Tuple[List[float], int]],
+        cost_multiplier: float = 1.0,
+    ) -> List[EmbeddingResult]:
+        """Create results in input order; only the first use of a fresh text is billed"""
+        results = []
+        billed = set()
+        for key, chunk in zip(keys, chunks):
+            if key in fresh and key not in billed:
+                billed.add(key)
+                embedding, token_count = fresh[key]
+                cost_cents = self._calculate_cost(token_count) * cost_multiplier
 
                 # Update totals
                 self.total_tokens += token_count
                 self.total_cost_cents += cost_cents
+            else:
+                embedding, token_count = fresh.get(key) or cached[key]
+                cost_cents = 0.0
+
+            result = EmbeddingResult(
+                chunk_id=chunk.chunk_id,
+                embedding=embedding,
+                model=self.model,
+                token_count=token_count,
+                cost_cents=cost_cents,
+            )
+            results.append(result)
 
-                result = EmbeddingResult(
-                    chunk_id=chunk.chunk_id,
-                    embedding=embedding,
-                    model=self.model,
-                    token_count=token_count,
-                    cost_cents=cost_cents,
-                )
-                results.append(result)
-
-        print(f"\nCompleted {len(results)} embeddings")
-        print(f"Total tokens: {self.total_tokens:,}")
-        print(f"Total cost: ${self.total_cost_cents / 100:.4f}")
+        logger.info("Completed %d embeddings (total tokens: %d, total cost: $%.4f)",
+                    len(results), self.total_tokens, self.total_cost_cents / 100)
 
         return results
 
@@ -263,11 +826,28 @@ class EmbeddingGenerator:
             'total_cost_cents': self.total_cost_cents,
             'total_cost_dollars': self.total_cost_cents / 100,
             'model': self.model,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_size': len(self._cache),
         }
 
+    def close(self):
+        """Close the persistent cache connection, if any"""
+        if self._disk_cache is not None:
+            self._disk_cache.close()
+            self._disk_cache = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def reset_stats(self):
         """Reset usage statistics"""
         self.total_tokens = 0
         self.total_cost_cents = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
 
 
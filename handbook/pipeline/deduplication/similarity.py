@@ -2,22 +2,26 @@
 Similarity calculation and duplicate detection
 
 Features:
-- Cosine similarity computation
+- Cosine similarity computation (NumPy-vectorized)
 - Threshold-based duplicate detection
 - ChromaDB integration for vector storage and search
 - Incremental deduplication (new vs existing chunks)
 """
 
-import math
+import logging
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+
 try:
     import chromadb
     from chromadb.config import Settings
 except ImportError:
     chromadb = None
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class SimilarityResult:
@@ -60,17 +64,17 @@ class SimilarityCalculator:
         if len(vec1) != len(vec2):
             raise ValueError(f"Vector dimensions must match: {len(vec1)} vs {len(vec2)}")
 
-        # Dot product
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
+        a = np.asarray(vec1, dtype=np.float64)
+        b = np.asarray(vec2, dtype=np.float64)
 
         # Magnitudes
-        magnitude1 = math.sqrt(sum(a * a for a in vec1))
-        magnitude2 = math.sqrt(sum(b * b for b in vec2))
+        magnitude1 = np.linalg.norm(a)
+        magnitude2 = np.linalg.norm(b)
 
         if magnitude1 == 0 or magnitude2 == 0:
             return 0.0
 
-        return dot_product / (magnitude1 * magnitude2)
+        return float(np.dot(a, b) / (magnitude1 * magnitude2))
 
     @staticmethod
     def is_duplicate(similarity: float, threshold: float = 0.90) -> bool:
@@ -93,7 +97,7 @@ class ChromaDBDeduplicator:
 
     Features:
     - Store chunk embeddings with metadata
-    - Fast similarity search with ivfflat index
+    - Fast similarity search with a tunable HNSW index
     - Incremental updates (add new chunks)
     - Batch operations for efficiency
     """
@@ -103,14 +107,28 @@ class ChromaDBDeduplicator:
         collection_name: str = "handbook_chunks",
         persist_directory: Optional[str] = "./chroma_db",
         similarity_threshold: float = 0.90,
+        hnsw_m: Optional[int] = None,
+        hnsw_construction_ef: Optional[int] = None,
+        hnsw_search_ef: Optional[int] = None,
     ):
         """
         Initialize ChromaDB deduplicator
 
+        HNSW parameters only apply when the collection is created; None keeps
+        ChromaDB's default. Reopening an existing collection silently keeps
+        its stored settings, so use clear_collection() (or a new collection
+        name) to change them. Raising M and construction_ef improves recall
+        at the cost of a slower, larger build; raising search_ef improves
+        recall at the cost of query latency. Compare against the installed
+        ChromaDB's defaults before lowering any of them
+
         Args:
             collection_name: Name of ChromaDB collection
             persist_directory: Directory to persist database (None for in-memory)
             similarity_threshold: Similarity threshold for duplicate detection
+            hnsw_m: Max neighbours per node in the HNSW graph
+            hnsw_construction_ef: Candidate list size while building the index
+            hnsw_search_ef: Candidate list size while querying
         """
         if chromadb is None:
             raise ImportError(
@@ -127,14 +145,29 @@ class ChromaDBDeduplicator:
         else:
             self.client = chromadb.Client()
 
+        # Collection settings, reused when the collection is recreated
+        self._collection_metadata = {"hnsw:space": "cosine"}  # Use cosine distance
+        hnsw_params = {
+            "hnsw:M": hnsw_m,
+            "hnsw:construction_ef": hnsw_construction_ef,
+            "hnsw:search_ef": hnsw_search_ef,
+        }
+        self._collection_metadata.update({k: v for k, v in hnsw_params.items() if v is not None})
+
         # Get or create collection
         self.collection = self.client.get_or_create_collection(
             name=collection_name,
-            metadata={"hnsw:space": "cosine"}  # Use cosine distance
+            metadata=self._collection_metadata,
         )
 
-        print(f"Initialized ChromaDB collection: {collection_name}")
-        print(f"Existing chunks: {self.collection.count()}")
+        stored = self.collection.metadata or {}
+        ignored = {k: v for k, v in self._collection_metadata.items() if stored.get(k) != v}
+        if ignored:
+            logger.warning("Collection %s already exists; ignoring requested settings %s "
+                           "(use clear_collection() to apply them)", collection_name, ignored)
+
+        logger.info("Initialized ChromaDB collection: %s (existing chunks: %d)",
+                    collection_name, self.collection.count())
 
     def add_chunks(
         self,
@@ -142,30 +175,41 @@ class ChromaDBDeduplicator:
         embeddings: List[List[float]],
         texts: List[str],
         metadatas: Optional[List[Dict]] = None,
+        batch_size: int = 1024,
     ):
         """
         Add chunks to the database
 
+        Inserts are issued in slices of batch_size: one collection.add per
+        slice amortizes index/persist overhead, and stays under ChromaDB's
+        maximum batch size for large imports
+
         Args:
             chunk_ids: List of unique chunk IDs
             embeddings: List of embedding vectors
             texts: List of chunk texts
             metadatas: Optional list of metadata dictionaries
+            batch_size: Maximum number of chunks per collection.add call
         """
         if not chunk_ids:
             return
 
-        if metadatas is None:
-            metadatas = [{} for _ in chunk_ids]
-
-        self.collection.add(
-            ids=chunk_ids,
-            embeddings=embeddings,
-            documents=texts,
-            metadatas=metadatas,
-        )
+        # ChromaDB rejects empty metadata dicts, so store None for those rows
+        # (and omit metadatas entirely when no row has any)
+        if metadatas is not None:
+            metadatas = [metadata or None for metadata in metadatas]
+            if not any(metadatas):
+                metadatas = None
+
+        for i in range(0, len(chunk_ids), batch_size):
+            self.collection.add(
+                ids=chunk_ids[i:i + batch_size],
+                embeddings=embeddings[i:i + batch_size],
+                documents=texts[i:i + batch_size],
+                metadatas=metadatas[i:i + batch_size] if metadatas else None,
+            )
 
-        print(f"Added {len(chunk_ids)} chunks to collection")
+        logger.info("Added %d chunks to collection", len(chunk_ids))
 
     def find_similar(
         self,
@@ -192,13 +236,69 @@ class ChromaDBDeduplicator:
             n_results=top_k + 1 if not include_self else top_k,
         )
 
+        return self._to_similarity_results(results, 0, query_chunk_id, include_self)
+
+    def find_similar_batch(
+        self,
+        query_embeddings: List[List[float]],
+        query_chunk_ids: List[str],
+        top_k: int = 5,
+        include_self: bool = False,
+    ) -> List[List[SimilarityResult]]:
+        """
+        Find similar chunks for multiple embeddings with a single query
+
+        ChromaDB accepts a list of query embeddings, so N lookups cost one
+        collection.query call instead of N
+
+        Args:
+            query_embeddings: Query embedding vectors
+            query_chunk_ids: IDs of the query chunks (to filter self-matches)
+            top_k: Number of similar chunks to return per query
+            include_self: Whether to include the query chunk itself in results
+
+        Returns:
+            List of SimilarityResult lists, aligned with query_chunk_ids
+        """
+        if not query_embeddings:
+            return []
+
+        results = self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=top_k + 1 if not include_self else top_k,
+        )
+
+        return [
+            self._to_similarity_results(results, row, chunk_id, include_self)
+            for row, chunk_id in enumerate(query_chunk_ids)
+        ]
+
+    def _to_similarity_results(
+        self,
+        results: Dict,
+        row: int,
+        query_chunk_id: str,
+        include_self: bool,
+    ) -> List[SimilarityResult]:
+        """
+        Convert one row of a ChromaDB query response to SimilarityResults
+
+        Args:
+            results: Response of collection.query
+            row: Index of the query within the response
+            query_chunk_id: ID of the query chunk (to filter self-matches)
+            include_self: Whether to include the query chunk itself in results
+
+        Returns:
+            List of SimilarityResult objects above the similarity threshold
+        """
         similar_chunks = []
 
-        if not results['ids'] or not results['ids'][0]:
+        if not results['ids'] or row >= len(results['ids']) or not results['ids'][row]:
             return similar_chunks
 
-        for i in range(len(results['ids'][0])):
-            similar_id = results['ids'][0][i]
+        for i in range(len(results['ids'][row])):
+            similar_id = results['ids'][row][i]
 
             # Skip self-match
             if not include_self and similar_id == query_chunk_id:
@@ -206,7 +306,7 @@ class ChromaDBDeduplicator:
 
             # ChromaDB returns distance (lower = more similar)
             # Convert to similarity: similarity = 1 - distance
-            distance = results['distances'][0][i]
+            distance = results['distances'][row][i]
             similarity = 1 - distance
 
             # Only include results above threshold
@@ -217,8 +317,8 @@ class ChromaDBDeduplicator:
                 query_chunk_id=query_chunk_id,
                 similar_chunk_id=similar_id,
                 similarity=similarity,
-                chunk_text=results['documents'][0][i],
-                metadata=results['metadatas'][0][i] if results['metadatas'] else None,
+                chunk_text=results['documents'][row][i],
+                metadata=results['metadatas'][row][i] if results['metadatas'] else None,
             ))
 
         return similar_chunks
@@ -240,17 +340,13 @@ class ChromaDBDeduplicator:
         Returns:
             Dictionary mapping chunk_id -> list of similar chunks
         """
-        results = {}
-
-        for chunk_id, embedding in zip(chunk_ids, embeddings):
-            similar = self.find_similar(
-                query_embedding=embedding,
-                query_chunk_id=chunk_id,
-                top_k=top_k,
-            )
-            results[chunk_id] = similar
+        similar_lists = self.find_similar_batch(
+            query_embeddings=embeddings,
+            query_chunk_ids=chunk_ids,
+            top_k=top_k,
+        )
 
-        return results
+        return dict(zip(chunk_ids, similar_lists))
 
     def deduplicate_new_chunks(
         self,
@@ -262,6 +358,9 @@ class ChromaDBDeduplicator:
         """
         Deduplicate new chunks against existing database
 
+        Repeated chunk IDs within the batch (identical text) are checked and
+        stored once; later occurrences are skipped
+
         Args:
             new_chunk_ids: IDs of new chunks
             new_embeddings: Embeddings of new chunks
@@ -275,36 +374,70 @@ class ChromaDBDeduplicator:
             - Dictionary of duplicate mappings
         """
         unique_ids = []
+        unique_indices = []
         duplicate_ids = []
         duplicate_mappings = {}
+        seen = set()
 
-        print(f"\nChecking {len(new_chunk_ids)} new chunks for duplicates...")
+        total = len(new_chunk_ids)
+        logger.info("Checking %d new chunks for duplicates", total)
 
-        for i, (chunk_id, embedding, text) in enumerate(zip(new_chunk_ids, new_embeddings, new_texts)):
-            # Find similar chunks in existing database
-            similar = self.find_similar(
-                query_embedding=embedding,
-                query_chunk_id=chunk_id,
-                top_k=5,
-            )
+        # chunk_id is the SHA256 of the chunk text, so an ID already in the
+        # collection is an exact duplicate; one ID lookup skips the vector query
+        existing = self._get_existing(new_chunk_ids)
+
+        # Checked once so per-chunk progress costs nothing when DEBUG is off
+        debug = logger.isEnabledFor(logging.DEBUG)
+
+        first_indices = []
+        for i, chunk_id in enumerate(new_chunk_ids):
+            if chunk_id in seen:
+                if debug:
+                    logger.debug("[%d/%d] REPEATED IN BATCH: %.16s...", i + 1, total, chunk_id)
+                continue
+            seen.add(chunk_id)
+            first_indices.append(i)
+
+        # Everything not settled by ID goes into one batched vector query
+        to_query = [i for i in first_indices if new_chunk_ids[i] not in existing]
+        similar_by_index = dict(zip(to_query, self.find_similar_batch(
+            query_embeddings=[new_embeddings[i] for i in to_query],
+            query_chunk_ids=[new_chunk_ids[i] for i in to_query],
+            top_k=5,
+        )))
+
+        for i in first_indices:
+            chunk_id = new_chunk_ids[i]
+
+            if chunk_id in existing:
+                duplicate_ids.append(chunk_id)
+                duplicate_mappings[chunk_id] = [existing[chunk_id]]
+                if debug:
+                    logger.debug("[%d/%d] DUPLICATE: %.16s... (exact match)", i + 1, total, chunk_id)
+                continue
+
+            similar = similar_by_index[i]
 
             if similar:
                 # Duplicate found
                 duplicate_ids.append(chunk_id)
                 duplicate_mappings[chunk_id] = similar
 
-                print(f"  [{i+1}/{len(new_chunk_ids)}] DUPLICATE: {chunk_id[:16]}... "
-                      f"(similarity: {similar[0].similarity:.3f})")
+                if debug:
+                    logger.debug("[%d/%d] DUPLICATE: %.16s... (similarity: %.3f)",
+                                 i + 1, total, chunk_id, similar[0].similarity)
             else:
                 # Unique chunk
                 unique_ids.append(chunk_id)
-                print(f"  [{i+1}/{len(new_chunk_ids)}] UNIQUE: {chunk_id[:16]}...")
+                unique_indices.append(i)
+                if debug:
+                    logger.debug("[%d/%d] UNIQUE: %.16s...", i + 1, total, chunk_id)
 
-        print(f"\nResults: {len(unique_ids)} unique, {len(duplicate_ids)} duplicates")
+        logger.info("Results: %d unique, %d duplicates, %d repeated in batch",
+                    len(unique_ids), len(duplicate_ids), total - len(seen))
 
         # Add unique chunks to database
         if unique_ids:
-            unique_indices = [i for i, cid in enumerate(new_chunk_ids) if cid in unique_ids]
             unique_embeddings = [new_embeddings[i] for i in unique_indices]
             unique_texts = [new_texts[i] for i in unique_indices]
             unique_metadatas = [new_metadatas[i] for i in unique_indices] if new_metadatas else None
@@ -313,6 +446,36 @@ class ChromaDBDeduplicator:
 
         return unique_ids, duplicate_ids, duplicate_mappings
 
+    def _get_existing(self, chunk_ids: List[str]) -> Dict[str, SimilarityResult]:
+        """
+        Look up chunks whose IDs are already stored
+
+        Args:
+            chunk_ids: Chunk IDs to look up
+
+        Returns:
+            Dictionary mapping stored chunk ID to an exact-match SimilarityResult
+        """
+        if not chunk_ids:
+            return {}
+
+        found = self.collection.get(
+            ids=list(dict.fromkeys(chunk_ids)),
+            include=["documents", "metadatas"],
+        )
+
+        metadatas = found.get('metadatas') or [None] * len(found['ids'])
+        return {
+            chunk_id: SimilarityResult(
+                query_chunk_id=chunk_id,
+                similar_chunk_id=chunk_id,
+                similarity=1.0,
+                chunk_text=document,
+                metadata=metadata,
+            )
+            for chunk_id, document, metadata in zip(found['ids'], found['documents'], metadatas)
+        }
+
     def get_stats(self) -> Dict:
         """Get database statistics"""
         return {
@@ -326,8 +489,8 @@ class ChromaDBDeduplicator:
         self.client.delete_collection(self.collection_name)
         self.collection = self.client.create_collection(
             name=self.collection_name,
-            metadata={"hnsw:space": "cosine"}
+            metadata=self._collection_metadata,
         )
-        print(f"Cleared collection: {self.collection_name}")
+        logger.info("Cleared collection: %s", self.collection_name)
 
 
@@ -10,6 +10,7 @@ Tests the deduplication pipeline against the dataset with:
 
 import os
 import sys
+import logging
 import json
 from typing import Dict, List, Tuple
 from dataclasses import dataclass
@@ -397,4 +398,6 @@ def main():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("handbook.pipeline.deduplication").setLevel(logging.DEBUG)
     main()
@@ -10,6 +10,7 @@ Tests the complete flow:
 
 import os
 import sys
+import logging
 
 # Add project root to path for imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
@@ -292,4 +293,6 @@ def main():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("handbook.pipeline.deduplication").setLevel(logging.DEBUG)
     main()
@@ -169,6 +169,13 @@ def test_batch_processing():
     assert len(results) == 5, "Should process all 5 articles"
     assert total_chunks > 0, "Should generate chunks"
 
+    parallel = pipeline.process_batch(articles, max_workers=2, chunksize=2)
+    assert list(parallel.keys()) == list(results.keys()), "Parallel batch should keep article order"
+    assert all(
+        [c.chunk_id for c in parallel[aid]] == [c.chunk_id for c in results[aid]]
+        for aid in results
+    ), "Parallel batch should produce the same chunks"
+
     print("\n✓ Batch processing test passed\n")
 
 
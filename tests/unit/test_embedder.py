@@ -0,0 +1,547 @@
+"""
+Test script for embedding generation
+
+Uses a fake OpenAI client so no API key or network access is required.
+
+Tests:
+1. Concurrent batching keeps results aligned with input chunks
+2. Repeated texts are served from the cache without API calls
+3. Single-text (query) embeddings share the same cache
+4. Persistent cache survives a new generator instance
+5. Batch API path uploads uncached texts and bills at a discount
+6. Request rate limit spaces out concurrent batch requests
+7. In-memory cache is bounded (LRU) and honours the TTL
+8. Only transient API errors are retried
+9. A failed batch does not discard batches that succeeded
+10. Batch API failures are reported and successes are cached
+11. Batch polling retries transient errors and unfinished jobs can be resumed
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+# Add project root to path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from handbook.pipeline.deduplication.chunker import Chunk
+from handbook.pipeline.deduplication.embedder import EmbeddingGenerator
+
+
+class FakeEmbeddingsAPI:
+    """Mimics client.embeddings; embeds each text as [len(text)]"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def create(self, model, input):
+        texts = input if isinstance(input, list) else [input]
+        with self._lock:
+            self.calls.append(list(texts))
+
+        # Later batches finish first to exercise out-of-order completion
+        if self.delay:
+            time.sleep(self.delay / len(self.calls))
+
+        return SimpleNamespace(
+            data=[SimpleNamespace(embedding=[float(len(t))]) for t in texts],
+            usage=SimpleNamespace(total_tokens=sum(len(t) // 4 for t in texts)),
+        )
+
+
+class FakeBatchAPI:
+    """
+    Mimics client.files / client.batches; jobs complete on the second poll
+
+    Texts in fail_texts are reported in the job's error file, texts in
+    drop_texts never come back at all. Exceptions in poll_errors are raised
+    by the first status checks, one per check
+    """
+
+    def __init__(self, fail_texts=(), drop_texts=(), poll_errors=()):
+        self.uploads = {}
+        self.files = {}
+        self.polls = 0
+        self.fail_texts = set(fail_texts)
+        self.drop_texts = set(drop_texts)
+        self.poll_errors = list(poll_errors)
+
+    def create(self, file=None, purpose=None, input_file_id=None, endpoint=None, completion_window=None):
+        if file is not None:
+            file_id = f'file-{len(self.uploads)}'
+            self.uploads[file_id] = file[1].decode('utf-8')
+            return SimpleNamespace(id=file_id)
+        return SimpleNamespace(id=f'batch-{input_file_id}')
+
+    def retrieve(self, batch_id):
+        if self.poll_errors:
+            raise self.poll_errors.pop(0)
+        self.polls += 1
+        if self.polls == 1:
+            return SimpleNamespace(status='in_progress', output_file_id=None, error_file_id=None)
+
+        input_file_id = batch_id.replace('batch-', '')
+        output, errors = [], []
+        for line in self.uploads[input_file_id].splitlines():
+            request = json.loads(line)
+            text = request['body']['input']
+            if text in self.drop_texts:
+                continue
+            if text in self.fail_texts:
+                errors.append(json.dumps({
+                    'custom_id': request['custom_id'],
+                    'response': {'status_code': 400, 'body': {'error': {'message': 'input too long'}}},
+                    'error': None,
+                }))
+                continue
+            output.append(json.dumps({
+                'custom_id': request['custom_id'],
+                'response': {
+                    'status_code': 200,
+                    'body': {
+                        'data': [{'embedding': [float(len(text))]}],
+                        'usage': {'total_tokens': len(text) // 4},
+                    },
+                },
+                'error': None,
+            }))
+
+        output_file_id = f'out-{input_file_id}' if output else None
+        error_file_id = f'err-{input_file_id}' if errors else None
+        self.files[output_file_id] = '\n'.join(output)
+        self.files[error_file_id] = '\n'.join(errors)
+        return SimpleNamespace(status='completed', output_file_id=output_file_id, error_file_id=error_file_id)
+
+    def content(self, file_id):
+        return SimpleNamespace(text=self.files[file_id])
+
+
+def make_embedder(**kwargs) -> EmbeddingGenerator:
+    """Build an EmbeddingGenerator wired to the fake client"""
+    delay = kwargs.pop('delay', 0.0)
+    embedder = EmbeddingGenerator(api_key='test-key', **kwargs)
+    batch_api = FakeBatchAPI()
+    embedder.client = SimpleNamespace(
+        embeddings=FakeEmbeddingsAPI(delay=delay),
+        files=batch_api,
+        batches=batch_api,
+    )
+    return embedder
+
+
+def make_chunks(count: int):
+    """Create chunks with distinct text lengths"""
+    return [
+        Chunk(
+            chunk_id='',
+            chunk_text='x' * (10 + i),
+            chunk_index=i,
+            article_id='test_article',
+            source='Test',
+        )
+        for i in range(count)
+    ]
+
+
+def test_concurrent_batches_preserve_order():
+    """Test that concurrent batch requests keep results in input order"""
+    print("="*60)
+    print("TEST 1: Concurrent Batches Preserve Order")
+    print("="*60)
+
+    chunks = make_chunks(7)
+    embedder = make_embedder(batch_size=2, max_concurrency=4, delay=0.05)
+
+    results = embedder.embed_chunks(chunks)
+
+    assert len(embedder.client.embeddings.calls) == 4, "7 chunks / batch_size 2 should be 4 requests"
+    assert [r.chunk_id for r in results] == [c.chunk_id for c in chunks], "Results should follow input order"
+    assert all(r.embedding == [float(len(c.chunk_text))] for r, c in zip(results, chunks)), \
+        "Each embedding should belong to its chunk"
+    print("✓ Concurrent batching test passed\n")
+
+
+def test_cache_skips_repeated_texts():
+    """Test that repeated texts are embedded once and then served from cache"""
+    print("="*60)
+    print("TEST 2: Cache Skips Repeated Texts")
+    print("="*60)
+
+    chunks = make_chunks(3)
+    repeated = chunks + [chunks[0]]
+    embedder = make_embedder(batch_size=10)
+
+    first = embedder.embed_chunks(repeated)
+    tokens_after_first = embedder.total_tokens
+    second = embedder.embed_chunks(chunks)
+
+    calls = embedder.client.embeddings.calls
+    assert len(calls) == 1, "Second call should be fully cached"
+    assert len(calls[0]) == 3, "Duplicate text within a call should be embedded once"
+    assert first[3].embedding == first[0].embedding, "Duplicate chunk should reuse the embedding"
+    assert all(r.cost_cents == 0.0 for r in second), "Cached embeddings should not be billed"
+    assert embedder.total_tokens == tokens_after_first, "Cached embeddings should not add tokens"
+
+    stats = embedder.get_usage_stats()
+    print(f"Cache stats: hits={stats['cache_hits']}, misses={stats['cache_misses']}")
+    assert stats['cache_misses'] == 3
+    assert stats['cache_hits'] == 4
+    print("✓ Cache test passed\n")
+
+
+def test_embed_text_uses_cache():
+    """Test that repeated single-text embeddings reuse the cache"""
+    print("="*60)
+    print("TEST 3: Single-Text Embedding Cache")
+    print("="*60)
+
+    embedder = make_embedder()
+    chunk = make_chunks(1)[0]
+
+    vec1, _ = embedder.embed_text("what is retrieval augmented generation?")
+    vec2, _ = embedder.embed_text("what is retrieval augmented generation?")
+    embedder.embed_chunks([chunk])
+    result = embedder.embed_chunk(chunk)
+
+    assert vec1 == vec2
+    vec3, _ = embedder.embed_text("what is  retrieval augmented generation？\n")
+    assert vec3 == vec1, "Width/whitespace variants should share a cache entry"
+    assert len(embedder.client.embeddings.calls) == 2, "Only the first query and the chunk should hit the API"
+    assert result.cost_cents == 0.0, "Chunk embedded earlier should come from cache"
+    print("✓ Single-text cache test passed\n")
+
+
+def test_persistent_cache():
+    """Test that the SQLite cache is reused by a fresh generator"""
+    print("="*60)
+    print("TEST 4: Persistent Embedding Cache")
+    print("="*60)
+
+    chunks = make_chunks(3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, 'embeddings.db')
+
+        with make_embedder(cache_path=cache_path) as first:
+            expected = [r.embedding for r in first.embed_chunks(chunks)]
+
+        with make_embedder(cache_path=cache_path) as second:
+            results = second.embed_chunks(chunks)
+
+    assert second.client.embeddings.calls == [], "Re-run should be served from disk"
+    assert [r.embedding for r in results] == expected
+    assert second.total_tokens == 0, "Disk-cached embeddings should not be billed"
+    print("✓ Persistent cache test passed\n")
+
+
+def test_batch_api_path():
+    """Test that the Batch API path embeds only uncached texts at half price"""
+    print("="*60)
+    print("TEST 5: Batch API Embeddings")
+    print("="*60)
+
+    chunks = make_chunks(3)
+    embedder = make_embedder()
+    embedder.embed_chunk(chunks[0])
+    online_cost = embedder.total_cost_cents
+    embedder.reset_stats()
+
+    results = embedder.embed_chunks_batch_api(chunks, poll_interval=0)
+
+    uploads = embedder.client.files.uploads
+    assert len(uploads) == 1
+    assert len(uploads['file-0'].splitlines()) == 2, "Cached chunk should not be uploaded"
+    assert [r.embedding for r in results] == [[float(len(c.chunk_text))] for c in chunks]
+    assert results[0].cost_cents == 0.0, "Cached chunk should not be billed"
+
+    expected = sum(embedder._calculate_cost(len(c.chunk_text) // 4) for c in chunks[1:]) / 2
+    assert abs(embedder.total_cost_cents - expected) < 1e-12, "Batch jobs should be billed at 50%"
+    assert online_cost > 0
+    print("✓ Batch API test passed\n")
+
+
+def test_batch_api_partial_failure():
+    """Test that failed or missing Batch API requests raise a clear error"""
+    print("="*60)
+    print("TEST 10: Batch API Partial Failure")
+    print("="*60)
+
+    chunks = make_chunks(5)
+    embedder = make_embedder()
+    embedder.MAX_BATCH_API_REQUESTS = 3
+    embedder.client.files = embedder.client.batches = FakeBatchAPI(
+        fail_texts=[chunks[1].chunk_text],
+        drop_texts=[chunks[4].chunk_text],
+    )
+
+    try:
+        embedder.embed_chunks_batch_api(chunks, poll_interval=0)
+        assert False, "Failed requests should raise"
+    except Exception as e:
+        message = str(e)
+    print(f"Error: {message[:120]}...")
+
+    assert len(embedder.client.files.uploads) == 2, "5 requests with a limit of 3 should be 2 jobs"
+    assert "2 of 5 requests" in message
+    assert embedder._cache_key(chunks[1].chunk_text) in message, "Error should name the failed custom_id"
+    assert embedder._cache_key(chunks[4].chunk_text) in message, "Error should name the missing custom_id"
+    assert embedder.get_usage_stats()['cache_size'] == 3, "Successful embeddings should be cached"
+
+    results = embedder.embed_chunks(chunks)
+    assert embedder.client.embeddings.calls == [[chunks[1].chunk_text, chunks[4].chunk_text]], \
+        "Rerun should only request the failed texts"
+    assert [r.embedding for r in results] == [[float(len(c.chunk_text))] for c in chunks]
+    print("✓ Batch API partial failure test passed\n")
+
+
+def test_rate_limit():
+    """Test that requests_per_minute paces requests across workers"""
+    print("="*60)
+    print("TEST 6: Request Rate Limit")
+    print("="*60)
+
+    chunks = make_chunks(4)
+    embedder = make_embedder(batch_size=1, max_concurrency=4, requests_per_minute=1200)
+
+    started = time.monotonic()
+    embedder.embed_chunks(chunks)
+    elapsed = time.monotonic() - started
+
+    print(f"4 requests at 1200 rpm took {elapsed:.3f}s")
+    assert len(embedder.client.embeddings.calls) == 4
+    assert elapsed >= 3 * 0.05 - 0.01, "Requests should be spaced 50ms apart"
+    print("✓ Rate limit test passed\n")
+
+
+def test_cache_lru_and_ttl():
+    """Test LRU eviction and TTL expiry of the in-memory cache"""
+    print("="*60)
+    print("TEST 7: Cache LRU Eviction and TTL")
+    print("="*60)
+
+    embedder = make_embedder(cache_max_size=2)
+    embedder.embed_text("alpha")
+    embedder.embed_text("beta")
+    embedder.embed_text("alpha")   # alpha becomes most recently used
+    embedder.embed_text("gamma")   # evicts beta
+    assert embedder.get_usage_stats()['cache_size'] == 2
+
+    calls_before = len(embedder.client.embeddings.calls)
+    embedder.embed_text("alpha")
+    assert len(embedder.client.embeddings.calls) == calls_before, "Recently used entry should survive"
+    embedder.embed_text("beta")
+    assert len(embedder.client.embeddings.calls) == calls_before + 1, "LRU entry should be evicted"
+
+    embedder = make_embedder(cache_ttl=0.05)
+    embedder.embed_text("alpha")
+    time.sleep(0.06)
+    embedder.embed_text("alpha")
+    assert len(embedder.client.embeddings.calls) == 2, "Expired entry should be re-embedded"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, 'embeddings.db')
+
+        with make_embedder(cache_ttl=0, cache_path=cache_path) as embedder:
+            embedder.embed_text("alpha")
+            embedder.embed_text("alpha")
+            assert len(embedder.client.embeddings.calls) == 2, "cache_ttl=0 should also bypass the disk tier"
+
+        with make_embedder(cache_ttl=1.0, cache_path=cache_path) as writer:
+            writer.embed_text("beta")
+        time.sleep(0.3)
+
+        with make_embedder(cache_ttl=1.0, cache_path=cache_path) as reader:
+            reader.embed_text("beta")
+            assert reader.client.embeddings.calls == [], "Fresh disk entry should be served"
+            time.sleep(0.75)
+            reader.embed_text("beta")
+            assert len(reader.client.embeddings.calls) == 1, \
+                "Promoted entry should keep its original timestamp and expire on time"
+    print("✓ Cache LRU/TTL test passed\n")
+
+
+class FlakyEmbeddingsAPI(FakeEmbeddingsAPI):
+    """Raises the given errors on the first calls, then succeeds"""
+
+    def __init__(self, errors):
+        super().__init__()
+        self.errors = list(errors)
+
+    def create(self, model, input):
+        if self.errors:
+            with self._lock:
+                self.calls.append(input)
+            raise self.errors.pop(0)
+        return super().create(model, input)
+
+
+def make_api_error(error_class, status_code: int):
+    """Build an OpenAI status error without a real HTTP call"""
+    request = httpx.Request('POST', 'https://api.openai.com/v1/embeddings')
+    response = httpx.Response(status_code, request=request)
+    return error_class('test error', response=response, body=None)
+
+
+def test_retry_transient_errors_only():
+    """Test that rate limits are retried and client errors fail fast"""
+    print("="*60)
+    print("TEST 8: Retry Transient Errors Only")
+    print("="*60)
+
+    embedder = make_embedder(retry_delay=0.01)
+    embedder.client.embeddings = FlakyEmbeddingsAPI([make_api_error(openai.RateLimitError, 429)])
+    embedding, _ = embedder.embed_text("retry me")
+    assert embedding == [float(len("retry me"))]
+    assert len(embedder.client.embeddings.calls) == 2, "Rate limit should be retried once"
+
+    embedder = make_embedder(retry_delay=0.01)
+    embedder.client.embeddings = FlakyEmbeddingsAPI([make_api_error(openai.AuthenticationError, 401)])
+    try:
+        embedder.embed_batch(["a", "b"])
+        assert False, "Authentication error should not be swallowed"
+    except openai.AuthenticationError:
+        pass
+    assert len(embedder.client.embeddings.calls) == 1, "Non-transient errors should not be retried"
+
+    embedder = make_embedder(max_retries=0)
+    embedding, _ = embedder.embed_text("no retries")
+    assert embedding == [float(len("no retries"))], "max_retries=0 should still make one attempt"
+
+    embedder.client.embeddings = FlakyEmbeddingsAPI([make_api_error(openai.RateLimitError, 429)])
+    try:
+        embedder.embed_batch(["a"])
+        assert False, "Transient error should propagate when retries are disabled"
+    except Exception as e:
+        assert "after 1 attempts" in str(e)
+    assert len(embedder.client.embeddings.calls) == 1
+    print("✓ Retry policy test passed\n")
+
+
+class FailingBatchEmbeddingsAPI(FakeEmbeddingsAPI):
+    """Fails every request containing the given text"""
+
+    def __init__(self, poison: str):
+        super().__init__()
+        self.poison = poison
+
+    def create(self, model, input):
+        if self.poison in input:
+            raise ValueError("bad batch")
+        return super().create(model, input)
+
+
+def test_partial_batch_failure_keeps_successes():
+    """Test that successful concurrent batches are cached when another fails"""
+    print("="*60)
+    print("TEST 9: Partial Batch Failure")
+    print("="*60)
+
+    chunks = make_chunks(6)
+    embedder = make_embedder(batch_size=2, max_concurrency=3)
+    embedder.client.embeddings = FailingBatchEmbeddingsAPI(chunks[2].chunk_text)
+
+    try:
+        embedder.embed_chunks(chunks)
+        assert False, "Failed batch should propagate"
+    except ValueError:
+        pass
+
+    stats = embedder.get_usage_stats()
+    assert stats['cache_size'] == 4, "Both successful batches should be cached"
+    assert embedder.total_tokens > 0, "Successful batches should still be billed"
+
+    embedder.client.embeddings = FakeEmbeddingsAPI()
+    results = embedder.embed_chunks(chunks)
+    assert embedder.client.embeddings.calls == [[chunks[2].chunk_text, chunks[3].chunk_text]], \
+        "Rerun should only request the failed batch"
+    assert [r.embedding for r in results] == [[float(len(c.chunk_text))] for c in chunks]
+    print("✓ Partial batch failure test passed\n")
+
+
+def test_batch_api_poll_errors_and_resume():
+    """Test that polling errors are retried and abandoned jobs are resumable"""
+    print("="*60)
+    print("TEST 11: Batch API Poll Errors and Resume")
+    print("="*60)
+
+    chunks = make_chunks(3)
+    embedder = make_embedder(retry_delay=0.01)
+    embedder.client.files = embedder.client.batches = FakeBatchAPI(
+        poll_errors=[make_api_error(openai.InternalServerError, 503)],
+    )
+    results = embedder.embed_chunks_batch_api(chunks, poll_interval=0)
+    assert [r.embedding for r in results] == [[float(len(c.chunk_text))] for c in chunks]
+    assert embedder.pending_batch_jobs == {}, "Collected jobs should not stay pending"
+
+    embedder = make_embedder(max_retries=1)
+    embedder.client.files = embedder.client.batches = FakeBatchAPI(
+        poll_errors=[make_api_error(openai.InternalServerError, 503)],
+    )
+    try:
+        embedder.embed_chunks_batch_api(chunks, poll_interval=0)
+        assert False, "Giving up on polling should raise"
+    except Exception as e:
+        message = str(e)
+    print(f"Error: {message[:120]}...")
+
+    assert list(embedder.pending_batch_jobs) == ['batch-file-0'], "Abandoned job should be kept"
+    assert 'batch-file-0' in message, "Error should name the unfinished batch job"
+    assert embedder.get_usage_stats()['cache_size'] == 0
+
+    results = embedder.embed_chunks_batch_api(
+        chunks, poll_interval=0, resume_jobs=embedder.pending_batch_jobs,
+    )
+    assert len(embedder.client.files.uploads) == 1, "Resuming should not upload the texts again"
+    assert [r.embedding for r in results] == [[float(len(c.chunk_text))] for c in chunks]
+    assert embedder.pending_batch_jobs == {}
+    print("✓ Batch API poll errors and resume test passed\n")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("\n" + "="*60)
+    print("EMBEDDING GENERATOR TEST SUITE")
+    print("="*60 + "\n")
+
+    tests = [
+        test_concurrent_batches_preserve_order,
+        test_cache_skips_repeated_texts,
+        test_embed_text_uses_cache,
+        test_persistent_cache,
+        test_batch_api_path,
+        test_rate_limit,
+        test_cache_lru_and_ttl,
+        test_retry_transient_errors_only,
+        test_partial_batch_failure_keeps_successes,
+        test_batch_api_partial_failure,
+        test_batch_api_poll_errors_and_resume,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"\n✗ Test failed: {test.__name__}")
+            print(f"  Error: {e}\n")
+            failed += 1
+
+    print("="*60)
+    print(f"TEST RESULTS: {passed} passed, {failed} failed")
+    print("="*60 + "\n")
+
+
+if __name__ == "__main__":
+    run_all_tests()
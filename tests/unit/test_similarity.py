@@ -0,0 +1,179 @@
+"""
+Test script for similarity search and deduplication
+
+Uses an in-memory ChromaDB collection with hand-made vectors,
+so no API key is required.
+
+Tests:
+1. Batched similarity search matches per-query search
+2. Pairwise cosine similarity
+3. Already-stored chunk IDs are flagged as exact duplicates
+4. Repeated chunk IDs within a batch are stored once
+"""
+
+import os
+import sys
+
+# Add project root to path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from handbook.pipeline.deduplication.similarity import ChromaDBDeduplicator, SimilarityCalculator
+
+
+# Stored chunks: two near-identical vectors and one orthogonal vector
+STORED_IDS = ['stored_a', 'stored_b', 'stored_c']
+STORED_EMBEDDINGS = [
+    [1.0, 0.0, 0.0],
+    [0.99, 0.1, 0.0],
+    [0.0, 0.0, 1.0],
+]
+STORED_TEXTS = ['alpha', 'alpha prime', 'gamma']
+
+
+def make_deduplicator(name: str, threshold: float = 0.90) -> ChromaDBDeduplicator:
+    """Create an empty in-memory deduplicator"""
+    dedup = ChromaDBDeduplicator(
+        collection_name=name,
+        persist_directory=None,
+        similarity_threshold=threshold,
+    )
+    dedup.clear_collection()
+    return dedup
+
+
+def test_find_similar_batch():
+    """Test that one batched query returns the same results as N single queries"""
+    print("="*60)
+    print("TEST 1: Batched Similarity Search")
+    print("="*60)
+
+    dedup = make_deduplicator("test_find_similar_batch")
+    dedup.add_chunks(STORED_IDS, STORED_EMBEDDINGS, STORED_TEXTS)
+
+    query_ids = ['query_1', 'query_2', 'stored_c']
+    query_embeddings = [
+        [1.0, 0.05, 0.0],   # close to stored_a / stored_b
+        [0.0, 1.0, 0.0],    # close to nothing
+        [0.0, 0.0, 1.0],    # identical to stored_c (self-match filtered)
+    ]
+
+    batched = dedup.find_similar_batch(query_embeddings, query_ids, top_k=2)
+    single = [
+        dedup.find_similar(emb, qid, top_k=2)
+        for emb, qid in zip(query_embeddings, query_ids)
+    ]
+
+    assert len(batched) == 3, "Should return one result list per query"
+    for b, s in zip(batched, single):
+        assert [r.similar_chunk_id for r in b] == [r.similar_chunk_id for r in s]
+
+    assert {r.similar_chunk_id for r in batched[0]} == {'stored_a', 'stored_b'}
+    assert batched[1] == [], "Orthogonal query should have no duplicates"
+    assert batched[2] == [], "Self-match should be filtered out"
+
+    by_id = dedup.find_duplicates_batch(query_ids, query_embeddings, top_k=2)
+    assert list(by_id.keys()) == query_ids
+    print("✓ Batched similarity search test passed\n")
+
+
+def test_cosine_similarity():
+    """Test pairwise cosine similarity, including zero vectors"""
+    print("="*60)
+    print("TEST 2: Cosine Similarity")
+    print("="*60)
+
+    calc = SimilarityCalculator()
+
+    assert abs(calc.cosine_similarity([1.0, 0.0, 0.0], [2.0, 0.0, 0.0]) - 1.0) < 1e-9
+    assert abs(calc.cosine_similarity([1.0, 0.0, 0.0], [0.0, 3.0, 0.0])) < 1e-9
+    assert abs(calc.cosine_similarity([1.0, 1.0], [1.0, 0.0]) - 2 ** -0.5) < 1e-9
+    assert calc.cosine_similarity([0.0, 0.0], [1.0, 0.0]) == 0.0, "Zero vector should score 0"
+
+    try:
+        calc.cosine_similarity([1.0, 0.0], [1.0, 0.0, 0.0])
+        assert False, "Mismatched dimensions should raise"
+    except ValueError:
+        pass
+    print("✓ Cosine similarity test passed\n")
+
+
+def test_exact_id_short_circuit():
+    """Test that re-submitted chunks are caught by ID without a vector query"""
+    print("="*60)
+    print("TEST 3: Exact-ID Duplicate Short-Circuit")
+    print("="*60)
+
+    dedup = make_deduplicator("test_exact_id_short_circuit")
+    dedup.add_chunks(STORED_IDS, STORED_EMBEDDINGS, STORED_TEXTS)
+
+    unique, duplicates, mappings = dedup.deduplicate_new_chunks(
+        new_chunk_ids=['stored_c', 'new_d'],
+        new_embeddings=[[0.0, 0.0, 1.0], [0.0, 1.0, 0.0]],
+        new_texts=['gamma', 'delta'],
+    )
+
+    assert duplicates == ['stored_c'], "Stored chunk ID should be a duplicate"
+    assert unique == ['new_d']
+    assert mappings['stored_c'][0].similarity == 1.0
+    assert mappings['stored_c'][0].chunk_text == 'gamma'
+    assert dedup.collection.count() == 4, "Only the unique chunk should be added"
+    print("✓ Exact-ID short-circuit test passed\n")
+
+
+def test_repeated_ids_in_batch():
+    """Test that identical chunks within one batch are collapsed"""
+    print("="*60)
+    print("TEST 4: Repeated Chunk IDs Within a Batch")
+    print("="*60)
+
+    dedup = make_deduplicator("test_repeated_ids_in_batch")
+
+    unique, duplicates, _ = dedup.deduplicate_new_chunks(
+        new_chunk_ids=['new_d', 'new_e', 'new_d'],
+        new_embeddings=[[0.0, 1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]],
+        new_texts=['delta', 'epsilon', 'delta'],
+        new_metadatas=[{'n': 1}, {}, {'n': 3}],
+    )
+
+    assert unique == ['new_d', 'new_e'], "Each chunk ID should be reported once"
+    assert duplicates == []
+    assert dedup.collection.count() == 2, "Repeated chunk should be stored once"
+    stored = dedup.collection.get(ids=['new_d'], include=["metadatas"])
+    assert stored['metadatas'][0] == {'n': 1}, "First occurrence should be kept"
+    stored = dedup.collection.get(ids=['new_e'], include=["metadatas"])
+    assert stored['metadatas'][0] is None, "Empty metadata should be stored as None"
+    print("✓ Repeated chunk ID test passed\n")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("\n" + "="*60)
+    print("SIMILARITY TEST SUITE")
+    print("="*60 + "\n")
+
+    tests = [
+        test_find_similar_batch,
+        test_cosine_similarity,
+        test_exact_id_short_circuit,
+        test_repeated_ids_in_batch,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"\n✗ Test failed: {test.__name__}")
+            print(f"  Error: {e}\n")
+            failed += 1
+
+    print("="*60)
+    print(f"TEST RESULTS: {passed} passed, {failed} failed")
+    print("="*60 + "\n")
+
+
+if __name__ == "__main__":
+    run_all_tests()